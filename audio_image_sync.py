@@ -2,15 +2,49 @@ import argparse
 import os
 import random
 import shutil
+import subprocess
+import tempfile
+import textwrap
 from glob import glob
 
+import numpy as np
 from PIL import Image
 from pydub.utils import mediainfo
 
+from screenplay_parser import parse_bracketed_element
+
 # Standard video size for YouTube (HD)
 TARGET_WIDTH = 1280
 TARGET_HEIGHT = 720
 
+# Output renditions (width, height); each is scaled to cover, then centre-cropped
+RENDITIONS = {
+    "hd": (TARGET_WIDTH, TARGET_HEIGHT),
+    "1080p": (1920, 1080),
+    "shorts": (1080, 1920),  # 9:16 vertical
+}
+
+# On-screen text: vertical position and font size as a fraction of frame width
+OVERLAY_FONT = "Sans"
+OVERLAY_WRAP = 30  # Characters per line, so wrapped text fits every rendition
+OVERLAY_STYLES = {
+    "title_card": {"y": "(h-text_h)/2", "size": 0.045},
+    "end_card": {"y": "(h-text_h)/2", "size": 0.045},
+    "super": {"y": "h-text_h-h/10", "size": 0.03},
+}
+
+# Pan/zoom (Ken Burns) motion settings
+MOTION_FPS = 30
+MOTION_ZOOM = 1.15  # Zoom factor between the widest and tightest crop of a shot
+MOTION_BATCH = 4  # Frames resampled per NumPy batch
+# Pan start/end anchors (x0, y0, x1, y1) as fractions of the free crop margin
+MOTION_PANS = [
+    (0.5, 0.5, 0.5, 0.5),
+    (0.0, 0.5, 1.0, 0.5),
+    (1.0, 0.0, 0.0, 1.0),
+    (0.5, 1.0, 0.5, 0.0),
+]
+
 
 def find_audio_file(folder):
     if mp3_files := glob(os.path.join(folder, "*.mp3")):
@@ -43,11 +77,36 @@ def get_audio_duration(audio_file):
 def resize_and_save(image_path, output_path, size=(TARGET_WIDTH, TARGET_HEIGHT)):
     with Image.open(image_path) as img:
         img = img.convert("RGB")  # Convert to RGB (webp and png may have alpha)
-        img = img.resize(size, Image.LANCZOS)
-        img.save(output_path, format="WEBP")
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS)
+        # Frames are only read back by ffmpeg, so favour encode speed
+        img.save(output_path, format="PNG", compress_level=1)
+
+
+def link_or_copy(source_path, output_path):
+    try:
+        os.link(source_path, output_path)
+    except OSError:
+        shutil.copyfile(source_path, output_path)
+
+
+def prepare_frame(image_path, output_path, size=(TARGET_WIDTH, TARGET_HEIGHT)):
+    """Write a target-sized PNG frame, reusing the source when it already is one."""
+    with Image.open(image_path) as img:  # Reads the header only
+        ready = img.format == "PNG" and img.mode == "RGB" and img.size == size
+    if ready:
+        link_or_copy(image_path, output_path)
+    else:
+        resize_and_save(image_path, output_path, size)
 
 
-def duplicate_images(audio_file, image_patterns, output_folder, target_folder):
+def duplicate_images(
+    audio_file,
+    image_patterns,
+    output_folder,
+    target_folder,
+    size=(TARGET_WIDTH, TARGET_HEIGHT),
+):
     # Support multiple image patterns
     image_files = find_image_files(target_folder, image_patterns)
     if len(image_files) == 0:
@@ -66,23 +125,299 @@ def duplicate_images(audio_file, image_patterns, output_folder, target_folder):
     idx = 0
     for image_idx, image_path in enumerate(image_files):
         repeats = frames_per_image + (1 if image_idx < remainder else 0)
+        first_frame_path = None
         for _ in range(repeats):
-            temp_image_path = os.path.join(temp_dir, f"image_{idx + 1:04d}.webp")
-            resize_and_save(image_path, temp_image_path)
+            temp_image_path = os.path.join(temp_dir, f"image_{idx + 1:04d}.png")
+            # Prepare each source once; repeated frames are links to it
+            if first_frame_path is None:
+                prepare_frame(image_path, temp_image_path, size)
+                first_frame_path = temp_image_path
+            else:
+                link_or_copy(first_frame_path, temp_image_path)
             idx += 1
 
     return temp_dir
 
 
-def create_video(temp_dir, audio_file, output_file):
-    os.system(
-        f"ffmpeg -framerate 1 -pattern_type glob -i '{temp_dir}/image_*.webp' -i '{audio_file}' "
-        "-filter_complex '[0:v]fps=1,format=yuv420p[v];[1:a]aresample=async=1[a]' "
-        "-map '[v]' -map '[a]' -c:v libx264 -c:a aac -strict experimental -shortest "
-        f"{output_file}"
+def frame_size(renditions):
+    """16:9 size to prepare frames at before they are split into renditions.
+
+    The height matches the largest short side among the renditions, e.g.
+    1920x1080 when 1080p or shorts is requested, so landscape renditions only
+    scale down and shorts crop from full 1080-line frames.
+    """
+    height = max(min(RENDITIONS[name]) for name in renditions)
+    return height * TARGET_WIDTH // TARGET_HEIGHT, height
+
+
+def rendition_paths(output_file, renditions):
+    """Map each rendition name to its output file; "hd" keeps the base name."""
+    base, ext = os.path.splitext(output_file)
+    return {
+        name: output_file if name == "hd" else f"{base}_{name}{ext}"
+        for name in renditions
+    }
+
+
+def encode_audio(audio_file, output_path):
+    """Encode the soundtrack to AAC once so every rendition can stream-copy it."""
+    subprocess.run(
+        ["ffmpeg", "-y", "-i", audio_file, "-vn", "-af", "aresample=async=1"]
+        + ["-c:a", "aac", output_path],
+        check=True,
     )
 
 
+def script_overlays(script_text):
+    """Collect title cards, end cards and on-screen text from a screenplay.
+
+    Shots are counted like parse_script.py counts image prompts (lines starting
+    with "[Visual]"), so each overlay is keyed to the index of the image it
+    appears over. Returns the overlays and the number of shots found.
+    """
+    overlays = []
+    shot = -1
+    for line in script_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("[Visual]"):
+            shot += 1
+            continue
+        if not (stripped.startswith("[") and "]" in stripped):
+            continue
+
+        element = parse_bracketed_element(stripped.strip("[]")) or {}
+        if element.get("type") == "super":
+            kind, text = "super", element["content"]
+        elif element.get("subtype") == "title_card":
+            kind, text = "title_card", element["content"]
+        elif element.get("subtype") == "end_card":
+            kind = "end_card"
+            text = element["description"].replace("End card", "", 1)
+        else:
+            continue
+        if text := text.strip(' :"'):
+            overlays.append({"kind": kind, "text": text, "shot": max(shot, 0)})
+    return overlays, shot + 1
+
+
+def check_shot_count(script_path, num_shots, num_images):
+    if num_shots is not None and num_shots != num_images:
+        print(
+            f"Warning: {script_path} has {num_shots} [Visual] shots but "
+            f"{num_images} images were found; overlay timing may be off."
+        )
+
+
+def shot_spans(num_images, audio_duration, fps=1):
+    """Return the (start, end) time in seconds of each image's shot."""
+    frames_per_image, remainder = divmod(int(audio_duration * fps), num_images)
+    spans = []
+    start = 0
+    for image_idx in range(num_images):
+        end = start + frames_per_image + (1 if image_idx < remainder else 0)
+        spans.append((start / fps, end / fps))
+        start = end
+    return spans
+
+
+def time_overlays(overlays, spans):
+    """Attach start/end times to overlays from the span of the shot they belong to."""
+    timed = []
+    for overlay in overlays:
+        start, end = spans[min(overlay["shot"], len(spans) - 1)]
+        timed.append({**overlay, "start": start, "end": end})
+    return timed
+
+
+def write_overlay_texts(overlays, directory):
+    """Write each unique overlay text once and point overlays at their file."""
+    text_files = {}
+    for overlay in overlays:
+        if overlay["text"] not in text_files:
+            path = os.path.join(directory, f"overlay_{len(text_files):03d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(textwrap.fill(overlay["text"], OVERLAY_WRAP))
+            text_files[overlay["text"]] = path
+    return [{**o, "textfile": text_files[o["text"]]} for o in overlays]
+
+
+def overlay_filter(overlays, width, height):
+    """Build a drawtext chain that burns timed overlays into one rendition."""
+    filters = []
+    for overlay in overlays:
+        style = OVERLAY_STYLES[overlay["kind"]]
+        size = round(width * style["size"])
+        filters.append(
+            f"drawtext=textfile='{overlay['textfile']}':expansion=none"
+            f":font={OVERLAY_FONT}:fontsize={size}:fontcolor=white"
+            f":box=1:boxcolor=black@0.5:boxborderw={size // 3}"
+            f":x=(w-text_w)/2:y={style['y']}"
+            f":enable='gte(t,{overlay['start']:.3f})*lt(t,{overlay['end']:.3f})'"
+        )
+    return "".join(f",{f}" for f in filters)
+
+
+def rendition_command(video_input_args, video_filter, audio_path, outputs, overlays=()):
+    """Build one ffmpeg command that splits a prepared stream into every rendition.
+
+    Overlays are drawn after each rendition's crop so text is sized and placed
+    for that frame, still within the same single encode pass.
+    """
+    labels = "".join(f"[s{i}]" for i in range(len(outputs)))
+    graph = [f"[0:v]{video_filter},format=yuv420p,split={len(outputs)}{labels}"]
+    output_args = []
+    for i, (name, path) in enumerate(outputs.items()):
+        width, height = RENDITIONS[name]
+        graph.append(
+            f"[s{i}]scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},setsar=1"
+            f"{overlay_filter(overlays, width, height)}[v{i}]"
+        )
+        output_args += ["-map", f"[v{i}]", "-map", "1:a", "-c:v", "libx264"]
+        output_args += ["-c:a", "copy", "-shortest", path]
+    return ["ffmpeg", "-y", *video_input_args, "-i", audio_path] + [
+        "-filter_complex",
+        ";".join(graph),
+        *output_args,
+    ]
+
+
+def create_video(temp_dir, audio_file, output_file, renditions=("hd",), overlays=()):
+    outputs = rendition_paths(output_file, renditions)
+    audio_path = os.path.join(temp_dir, "audio.m4a")
+    encode_audio(audio_file, audio_path)
+    frames = os.path.join(temp_dir, "image_*.png")
+    video_input_args = ["-framerate", "1", "-pattern_type", "glob", "-i", frames]
+    # Text files live in a system temp dir so their paths need no filter escaping
+    with tempfile.TemporaryDirectory() as text_dir:
+        overlays = write_overlay_texts(overlays, text_dir)
+        subprocess.run(
+            rendition_command(video_input_args, "fps=1", audio_path, outputs, overlays),
+            check=True,
+        )
+    return list(outputs.values())
+
+
+def load_motion_source(image_path, size=(TARGET_WIDTH, TARGET_HEIGHT)):
+    """Decode an image once, scaled to cover the widest crop of a motion shot."""
+    width, height = size
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        img = img.resize(
+            (round(width * MOTION_ZOOM), round(height * MOTION_ZOOM)), Image.LANCZOS
+        )
+        return np.asarray(img, dtype=np.float32)
+
+
+def ken_burns_windows(num_frames, source_size, zoom_in=True, pan=MOTION_PANS[0]):
+    """Compute the (x0, y0, x1, y1) crop window of every frame in a shot."""
+    src_w, src_h = source_size
+    t = np.linspace(0.0, 1.0, num_frames, dtype=np.float32)
+    t = t * t * (3.0 - 2.0 * t)  # Ease in/out
+    progress = t if zoom_in else 1.0 - t
+    scale = 1.0 + (MOTION_ZOOM - 1.0) * progress
+    crop_w = src_w / scale
+    crop_h = src_h / scale
+    x0 = (src_w - crop_w) * (pan[0] + (pan[2] - pan[0]) * t)
+    y0 = (src_h - crop_h) * (pan[1] + (pan[3] - pan[1]) * t)
+    return x0, y0, x0 + crop_w, y0 + crop_h
+
+
+def render_frames(source, x0, y0, x1, y1, size=(TARGET_WIDTH, TARGET_HEIGHT)):
+    """Bilinearly resample a batch of crop windows from one decoded source.
+
+    Returns a uint8 array of shape (batch, height, width, 3).
+    """
+    out_w, out_h = size
+    src_h, src_w = source.shape[:2]
+
+    # Sample positions at output pixel centres, one row per frame
+    gx = (np.arange(out_w, dtype=np.float32) + 0.5) / out_w
+    gy = (np.arange(out_h, dtype=np.float32) + 0.5) / out_h
+    xs = np.clip(x0[:, None] + (x1 - x0)[:, None] * gx - 0.5, 0, src_w - 1)
+    ys = np.clip(y0[:, None] + (y1 - y0)[:, None] * gy - 0.5, 0, src_h - 1)
+
+    xi = np.minimum(xs.astype(np.intp), src_w - 2)
+    yi = np.minimum(ys.astype(np.intp), src_h - 2)
+    wx = (xs - xi)[:, None, :, None]
+    wy = (ys - yi)[:, :, None, None]
+
+    # Interpolate rows first, then columns (the crop is axis-aligned)
+    rows = source[yi] * (1.0 - wy) + source[yi + 1] * wy
+    left = np.take_along_axis(rows, xi[:, None, :, None], axis=2)
+    right = np.take_along_axis(rows, xi[:, None, :, None] + 1, axis=2)
+    frames = left * (1.0 - wx) + right * wx
+    return np.clip(frames + 0.5, 0, 255).astype(np.uint8)
+
+
+def create_motion_video(
+    audio_file,
+    image_files,
+    output_file,
+    fps=MOTION_FPS,
+    size=(TARGET_WIDTH, TARGET_HEIGHT),
+    renditions=("hd",),
+    overlays=(),
+):
+    """Render pan/zoom shots for each image and stream raw frames to ffmpeg."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        audio_path = os.path.join(work_dir, "audio.m4a")
+        encode_audio(audio_file, audio_path)
+        return _stream_motion_video(
+            audio_file,
+            audio_path,
+            image_files,
+            output_file,
+            fps,
+            size,
+            renditions,
+            write_overlay_texts(overlays, work_dir),
+        )
+
+
+def _stream_motion_video(
+    audio_file, audio_path, image_files, output_file, fps, size, renditions, overlays
+):
+    width, height = size
+    total_frames = int(get_audio_duration(audio_file) * fps)
+    frames_per_image, remainder = divmod(total_frames, len(image_files))
+
+    outputs = rendition_paths(output_file, renditions)
+    video_input_args = [
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+        "-framerate", str(fps), "-i", "-",
+    ]  # fmt: skip
+    command = rendition_command(video_input_args, "null", audio_path, outputs, overlays)
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        for image_idx, image_path in enumerate(image_files):
+            num_frames = frames_per_image + (1 if image_idx < remainder else 0)
+            if num_frames == 0:
+                continue
+            source = load_motion_source(image_path, size)
+            windows = ken_burns_windows(
+                num_frames,
+                (source.shape[1], source.shape[0]),
+                zoom_in=image_idx % 2 == 0,
+                pan=MOTION_PANS[image_idx % len(MOTION_PANS)],
+            )
+            for start in range(0, num_frames, MOTION_BATCH):
+                batch = [w[start : start + MOTION_BATCH] for w in windows]
+                process.stdin.write(render_frames(source, *batch, size).tobytes())
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; its status is reported below
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with status {process.returncode}")
+    return list(outputs.values())
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Sync resized images with audio duration and create a YouTube-ready video."
@@ -102,8 +437,37 @@ def main():
         default="./",
         help="Folder to save the output video.",
     )
+    parser.add_argument(
+        "--motion",
+        action="store_true",
+        help="Render smooth pan/zoom motion instead of a 1 fps slideshow.",
+    )
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=MOTION_FPS,
+        help=f"Frame rate for --motion output (default: {MOTION_FPS}).",
+    )
+    parser.add_argument(
+        "--renditions",
+        type=str,
+        default="hd",
+        help=(
+            "Comma-separated outputs encoded in a single pass, from "
+            f"{', '.join(RENDITIONS)} (default: hd)."
+        ),
+    )
+    parser.add_argument(
+        "--script",
+        type=str,
+        default=None,
+        help="Screenplay whose title cards and on-screen text are burned in.",
+    )
 
     args = parser.parse_args()
+    renditions = [name.strip() for name in args.renditions.split(",")]
+    if unknown := [name for name in renditions if name not in RENDITIONS]:
+        parser.error(f"Unknown renditions: {', '.join(unknown)}")
     folder = args.folder
     audio_file = find_audio_file(folder)
     print(f"Using audio file: {audio_file}")
@@ -112,18 +476,61 @@ def main():
     image_patterns = [pattern.strip() for pattern in args.image_pattern.split(",")]
     print(f"Looking for images with patterns: {image_patterns}")
 
+    # Place output video in the parent of the provided folder
+    parent_folder = os.path.dirname(os.path.abspath(folder))
+    output_file = os.path.join(parent_folder, "output_video.mp4")
+
+    size = frame_size(renditions)
+
+    overlays = []
+    num_shots = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            overlays, num_shots = script_overlays(f.read())
+        print(f"Found {len(overlays)} on-screen text overlays in {args.script}")
+
+    if args.motion:
+        try:
+            image_files = find_image_files(folder, image_patterns)
+            check_shot_count(args.script, num_shots, len(image_files))
+            spans = shot_spans(
+                len(image_files), get_audio_duration(audio_file), args.fps
+            )
+            print(
+                f"Rendering {len(image_files)} images with motion at {args.fps} fps..."
+            )
+            for video_file in create_motion_video(
+                audio_file,
+                image_files,
+                output_file,
+                fps=args.fps,
+                size=size,
+                renditions=renditions,
+                overlays=time_overlays(overlays, spans),
+            ):
+                print(f"Video created: {video_file}")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+        return
+
     try:
         temp_dir = duplicate_images(
-            audio_file, image_patterns, args.output_folder, folder
+            audio_file, image_patterns, args.output_folder, folder, size
         )
         print(f"Temporary directory created at: {temp_dir}")
-        print(f"Processing {len(find_image_files(folder, image_patterns))} images...")
+        num_images = len(find_image_files(folder, image_patterns))
+        print(f"Processing {num_images} images...")
+        check_shot_count(args.script, num_shots, num_images)
 
-        # Place output video in the parent of the provided folder
-        parent_folder = os.path.dirname(os.path.abspath(folder))
-        output_file = os.path.join(parent_folder, "output_video.mp4")
-        create_video(temp_dir, audio_file, output_file)
-        print(f"Video created: {output_file}")
+        spans = shot_spans(num_images, get_audio_duration(audio_file))
+        for video_file in create_video(
+            temp_dir,
+            audio_file,
+            output_file,
+            renditions=renditions,
+            overlays=time_overlays(overlays, spans),
+        ):
+            print(f"Video created: {video_file}")
 
         shutil.rmtree(temp_dir)
         print(f"Temporary directory {temp_dir} has been removed.")
@@ -1,7 +1,14 @@
+import hashlib
 import io
 import json
 import logging
+import multiprocessing as mp
 import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from pathlib import Path
 
 import hydra
@@ -9,7 +16,7 @@ import numpy as np
 import openai
 import requests
 import torch
-from omegaconf import DictConfig
+from omegaconf import DictConfig, OmegaConf
 from PIL import Image
 
 # Configure logging
@@ -46,14 +53,31 @@ try:
         EulerDiscreteScheduler,
         StableDiffusionPipeline,
     )
+    from safetensors.torch import load_file as load_tensors
+    from safetensors.torch import save as save_tensors
 
     HAVE_TORCH = True
 except ImportError as e:
     logger.warning(f"Could not import torch/diffusers: {e}")
     HAVE_TORCH = False
 
+# Seconds before an HTTP backend gives up on a request
+HTTP_TIMEOUT = 120
+
+# Pixel budget for local CPU renders: 512x512, i.e. 680x384 at 16:9
+LOCAL_MAX_PIXELS = 512 * 512
+
+# Approximate resident memory of one float32 SD v1.4 pipeline process
+LOCAL_WORKER_MEMORY = 4 * 1024**3
+
+# On-disk cache of CLIP prompt embeddings for local generation
+EMBEDDING_CACHE_DIR = Path.home() / ".cache" / "synctube" / "prompt_embeds"
+
 
 class ImageGenerator:
+    # Whether generate() may run concurrently on one instance
+    thread_safe = True
+
     def generate(self, prompt, size):
         raise NotImplementedError
 
@@ -64,6 +88,7 @@ class ReveAIGenerator(ImageGenerator):
         if not self.api_key:
             raise EnvironmentError("REVE_API_KEY not found in environment.")
         self.api_url = "https://reveapi.com/api/generate-image"
+        self.timeout = HTTP_TIMEOUT
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -78,10 +103,12 @@ class ReveAIGenerator(ImageGenerator):
             "height": height,
         }
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=data)
+            response = requests.post(
+                self.api_url, headers=self.headers, json=data, timeout=self.timeout
+            )
             response.raise_for_status()
             if image_url := response.json().get("output"):
-                img_resp = requests.get(image_url)
+                img_resp = requests.get(image_url, timeout=self.timeout)
                 if img_resp.status_code == 200:
                     return img_resp.content
             logger.warning(f"[ReveAI] No output from API for prompt: {prompt}")
@@ -96,6 +123,7 @@ class DalleGenerator(ImageGenerator):
         if not self.api_key:
             raise EnvironmentError("OPENAI_API_KEY not found in environment.")
         openai.api_key = self.api_key
+        self.timeout = HTTP_TIMEOUT
 
     def generate(self, prompt, size):
         try:
@@ -111,7 +139,7 @@ class DalleGenerator(ImageGenerator):
             )
             if response and response.data:
                 image_url = response.data[0].url
-                img_resp = requests.get(image_url)
+                img_resp = requests.get(image_url, timeout=self.timeout)
                 if img_resp.status_code == 200:
                     return img_resp.content
                 logger.warning(
@@ -133,6 +161,7 @@ class HuggingFaceGenerator(ImageGenerator):
         self.api_url = (
             "https://api-inference.huggingface.co/models/CompVis/stable-diffusion-v1-4"
         )
+        self.timeout = HTTP_TIMEOUT
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -152,7 +181,9 @@ class HuggingFaceGenerator(ImageGenerator):
             },
         }
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=data)
+            response = requests.post(
+                self.api_url, headers=self.headers, json=data, timeout=self.timeout
+            )
             response.raise_for_status()
 
             if response.status_code == 200:
@@ -172,7 +203,16 @@ class HuggingFaceGenerator(ImageGenerator):
 
 
 class LocalStableDiffusionGenerator(ImageGenerator):
-    def __init__(self):
+    # One pipeline shares scheduler state across calls
+    thread_safe = False
+
+    def __init__(
+        self,
+        upscale=False,
+        image_size=None,
+        negative_prompt="",
+        cache_dir=EMBEDDING_CACHE_DIR,
+    ):
         if not HAVE_DEPENDENCIES:
             raise ImportError(
                 "Local generation requires additional dependencies. "
@@ -181,6 +221,10 @@ class LocalStableDiffusionGenerator(ImageGenerator):
 
         self.model_id = "CompVis/stable-diffusion-v1-4"
         self.device = "cpu"
+        self.upscale = upscale
+        self.image_size = image_size  # Overrides the size shared with API backends
+        self.cache_dir = cache_dir
+        self.embedding_cache = {}
         logger.info("[LocalSD] Using CPU. Generation will be slower.")
 
         # Load pipeline with CPU optimizations
@@ -206,12 +250,49 @@ class LocalStableDiffusionGenerator(ImageGenerator):
         # Move to CPU explicitly
         self.pipe = self.pipe.to(self.device)
 
+        # The negative (unconditional) prompt never changes, so encode it once
+        self.negative_prompt_embeds = self.encode_text(negative_prompt)
+
+    def encode_text(self, text):
+        """Return CLIP embeddings for `text`, cached in memory and on disk."""
+        key = (self.model_id, text)
+        if (embeds := self.embedding_cache.get(key)) is not None:
+            return embeds
+
+        digest = hashlib.sha256("\0".join(key).encode("utf-8")).hexdigest()
+        cache_path = (
+            self.cache_dir / f"{digest}.safetensors" if self.cache_dir else None
+        )
+        if cache_path and cache_path.exists():
+            try:
+                embeds = load_tensors(cache_path, device=self.device)["embeds"]
+            except Exception as e:
+                logger.warning(f"[LocalSD] Ignoring unreadable embedding cache: {e}")
+
+        if embeds is None:
+            with torch.inference_mode():
+                embeds, _ = self.pipe.encode_prompt(
+                    text,
+                    self.device,
+                    num_images_per_prompt=1,
+                    do_classifier_free_guidance=False,
+                )
+            if cache_path:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                data = save_tensors({"embeds": embeds.contiguous()})
+                atomic_write(cache_path, data)
+
+        self.embedding_cache[key] = embeds
+        return embeds
+
     def generate(self, prompt, size):
         try:
-            # Limit dimensions for CPU
-            width, height = map(int, size.lower().split("x"))
-            width = min(width, 512)
-            height = min(height, 512)
+            # Limit the pixel count for CPU, keeping the requested aspect ratio
+            size = self.image_size or size
+            target_width, target_height = map(int, size.lower().split("x"))
+            scale = min(1.0, (LOCAL_MAX_PIXELS / (target_width * target_height)) ** 0.5)
+            width = round(target_width * scale / 8) * 8
+            height = round(target_height * scale / 8) * 8
 
             # Force garbage collection
             import gc
@@ -219,18 +300,23 @@ class LocalStableDiffusionGenerator(ImageGenerator):
             torch.cuda.empty_cache() if torch.cuda.is_available() else None
             gc.collect()
 
+            prompt_embeds = self.encode_text(prompt)
             with torch.inference_mode():
                 image = self.pipe(
-                    prompt,
+                    prompt_embeds=prompt_embeds,
+                    negative_prompt_embeds=self.negative_prompt_embeds,
                     num_inference_steps=15,  # Further reduced for CPU
                     guidance_scale=7.0,
                     width=width,
                     height=height,
                 ).images[0]
 
-            # Optimize output image
+            if self.upscale and image.size != (target_width, target_height):
+                image = image.resize((target_width, target_height), Image.BICUBIC)
+
+            # Light compression: the PNG is an intermediate, not a deliverable
             img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format="PNG", optimize=True, quality=90)
+            image.save(img_byte_arr, format="PNG", compress_level=1)
             return img_byte_arr.getvalue()
 
         except Exception as e:
@@ -241,6 +327,143 @@ class LocalStableDiffusionGenerator(ImageGenerator):
             return None
 
 
+class HedgedGenerator(ImageGenerator):
+    """Query an ordered list of backends, hedging when the current one is slow.
+
+    The first backend is tried alone. If it fails, the next backend is tried
+    immediately; if it has not answered by its p95 latency, the next backend is
+    fired in parallel and the first successful response wins. The name of the
+    backend that served the last image is kept in `last_backend`.
+
+    Calls run on daemon threads, so an abandoned call that never returns
+    cannot starve later frames or block interpreter exit. Backends that are
+    not thread safe are skipped while an abandoned call on them is running.
+    """
+
+    def __init__(
+        self,
+        backends,
+        deadline=None,
+        hedge_percentile=0.95,
+        initial_hedge_delay=30.0,
+        min_samples=5,
+    ):
+        self.backends = list(backends)  # (name, generator) pairs in priority order
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_samples = min_samples
+        self.latencies = {name: [] for name, _ in self.backends}
+        self.last_backend = None
+        self.running = set()  # Backends with a call still in flight
+        self.running_lock = threading.Lock()
+
+        # Bound how long an HTTP backend can hold on to an abandoned call
+        if deadline:
+            for _, generator in self.backends:
+                if hasattr(generator, "timeout"):
+                    generator.timeout = min(generator.timeout, deadline)
+
+    def hedge_delay(self, name):
+        samples = sorted(self.latencies[name])
+        if len(samples) < self.min_samples:
+            return self.initial_hedge_delay
+        return samples[min(len(samples) - 1, int(self.hedge_percentile * len(samples)))]
+
+    def _timed_generate(self, future, name, generator, prompt, size):
+        try:
+            start = time.perf_counter()
+            img_data = generator.generate(prompt, size)
+            if img_data:
+                self.latencies[name].append(time.perf_counter() - start)
+            future.set_result((name, img_data))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self.running_lock:
+                self.running.discard(name)
+
+    def _submit(self, name, generator, prompt, size):
+        """Start a call on `name`, or return None if that backend is still busy."""
+        with self.running_lock:
+            if name in self.running and not generator.thread_safe:
+                return None
+            self.running.add(name)
+        future = Future()
+        threading.Thread(
+            target=self._timed_generate,
+            args=(future, name, generator, prompt, size),
+            daemon=True,
+        ).start()
+        return future
+
+    def generate(self, prompt, size):
+        self.last_backend = None
+        now = time.perf_counter()
+        deadline_at = now + self.deadline if self.deadline else float("inf")
+        in_flight = set()
+        next_backend = 0
+        hedge_at = now
+
+        while True:
+            now = time.perf_counter()
+            if next_backend < len(self.backends) and (not in_flight or now >= hedge_at):
+                name, generator = self.backends[next_backend]
+                next_backend += 1
+                if (future := self._submit(name, generator, prompt, size)) is None:
+                    logger.warning(f"[Hedge] {name} still busy, skipping it")
+                    continue
+                if in_flight:
+                    logger.info(f"[Hedge] Backend slow, also trying {name}")
+                in_flight.add(future)
+                hedge_at = now + self.hedge_delay(name)
+
+            if not in_flight:
+                return None
+            if now >= deadline_at:
+                logger.warning(f"[Hedge] Deadline exceeded for prompt: {prompt}")
+                return None
+
+            wake_at = deadline_at
+            if next_backend < len(self.backends):
+                wake_at = min(wake_at, hedge_at)
+            timeout = None
+            if wake_at != float("inf"):
+                timeout = max(0.0, wake_at - time.perf_counter())
+            done, in_flight = wait(
+                in_flight, timeout=timeout, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                try:
+                    name, img_data = future.result()
+                except Exception as e:
+                    logger.error(f"[Hedge] Backend raised: {e}")
+                    continue
+                if img_data:
+                    self.last_backend = name
+                    return img_data
+                logger.warning(f"[Hedge] {name} returned no image")
+
+
+def create_generator(name, local_upscale=False, local_image_size=None):
+    """Instantiate a single backend by its config name, or None if unavailable."""
+    if name == "reve":
+        return ReveAIGenerator()
+    elif name == "dalle":
+        return DalleGenerator()
+    elif name == "huggingface":
+        return HuggingFaceGenerator()
+    elif name == "local":
+        if not HAVE_TORCH:
+            logger.error("Local generation requires torch and diffusers")
+            return None
+        return LocalStableDiffusionGenerator(
+            upscale=local_upscale, image_size=local_image_size
+        )
+    logger.error(f"Unsupported image API: {name}")
+    return None
+
+
 def load_prompts(filepath: Path):
     with open(filepath, "r", encoding="utf-8") as f:
         return [
@@ -250,21 +473,314 @@ def load_prompts(filepath: Path):
         ]
 
 
-def save_images(generator, prompts, output_dir: Path, size: str):
+class JobJournal:
+    """Append-only JSONL record of each prompt's generation state.
+
+    Every state change appends one line; on load the last line per image index
+    wins, so a run killed mid-way leaves an accurate picture of what finished.
+    """
+
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path: Path, resume=False):
+        self.path = path
+        self.entries = {}
+        if resume and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn final line from a killed run
+                    self.entries[entry["idx"]] = entry
+        else:
+            path.write_text("", encoding="utf-8")
+
+    def record(self, idx, prompt, state, **fields):
+        previous = self.entries.get(idx, {})
+        attempts = (
+            previous.get("attempts", 0) if previous.get("prompt") == prompt else 0
+        )
+        if state == self.IN_PROGRESS:
+            attempts += 1
+        # Only attempts carry over; other fields describe this state change alone
+        entry = {"idx": idx, "prompt": prompt, "state": state, "attempts": attempts}
+        entry.update(time=time.time(), **fields)
+        self.entries[idx] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def open_journal(output_dir: Path, resume=False):
+    """Open the run journal and clear temp files left by interrupted writes."""
     output_dir.mkdir(parents=True, exist_ok=True)
+    for stale in output_dir.glob("*.tmp"):
+        stale.unlink()
+    return JobJournal(output_dir / "journal.jsonl", resume=resume)
+
+
+def pending_prompts(prompts, output_dir: Path, journal: JobJournal, resume=False):
+    """Return (index, prompt) pairs that still need an image.
+
+    Without `resume` an existing image counts as done. With `resume` the
+    journal decides: only failed, interrupted or never-finished prompts (or
+    ones whose text changed) are returned.
+    """
+    pending = []
     for idx, prompt in enumerate(prompts, 1):
         img_path = output_dir / f"{idx:03d}.png"
-        if img_path.exists():
+        done = img_path.exists()
+        if resume and (entry := journal.entries.get(idx)) is not None:
+            done = done and entry["state"] == JobJournal.DONE
+            done = done and entry["prompt"] == prompt
+        if done:
             logger.info(f"[SKIP] Image already exists: {img_path}")
             continue
+        journal.record(idx, prompt, JobJournal.PENDING)
+        pending.append((idx, prompt))
+    return pending
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write `data` to a temp file beside `path`, then rename it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_image(
+    output_dir: Path, idx, prompt, img_data, journal, seconds, backend=None
+):
+    img_path = output_dir / f"{idx:03d}.png"
+    if img_data:
+        atomic_write(img_path, img_data)
+        journal.record(idx, prompt, JobJournal.DONE, seconds=seconds, backend=backend)
+        served_by = f" (served by {backend})" if backend else ""
+        logger.info(f"[SUCCESS] Saved: {img_path}{served_by}")
+    else:
+        journal.record(idx, prompt, JobJournal.FAILED, seconds=seconds)
+        logger.warning(f"[FAIL] Could not generate image for: {prompt}")
 
+
+def save_images(generator, prompts, output_dir: Path, size: str, resume=False):
+    journal = open_journal(output_dir, resume)
+    for idx, prompt in pending_prompts(prompts, output_dir, journal, resume):
         logger.info(f"[INFO] Generating image {idx:03d}: {prompt}")
-        if img_data := generator.generate(prompt, size):
-            with open(img_path, "wb") as f:
-                f.write(img_data)
-            logger.info(f"[SUCCESS] Saved: {img_path}")
-        else:
-            logger.warning(f"[FAIL] Could not generate image for: {prompt}")
+        journal.record(idx, prompt, JobJournal.IN_PROGRESS)
+        start = time.perf_counter()
+        img_data = generator.generate(prompt, size)
+        elapsed = time.perf_counter() - start
+        backend = getattr(generator, "last_backend", None)
+        write_image(output_dir, idx, prompt, img_data, journal, elapsed, backend)
+
+
+def _shard_worker(
+    worker_id, cores, num_threads, size, upscale, task_queue, result_queue
+):
+    """Run one local pipeline pinned to `cores` until the task queue drains."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        torch.set_num_threads(num_threads)
+        generator = LocalStableDiffusionGenerator(upscale=upscale)
+
+        # Idle workers pull the next prompt, so slow shards never hold up the rest
+        while (task := task_queue.get()) is not None:
+            idx, prompt = task
+            result_queue.put(("start", worker_id, idx, prompt))
+            start = time.perf_counter()
+            img_data = generator.generate(prompt, size)
+            elapsed = time.perf_counter() - start
+            result_queue.put(("image", worker_id, idx, prompt, img_data, elapsed))
+    except Exception as e:
+        logger.error(f"[Shard {worker_id}] Worker failed: {e}")
+    finally:
+        result_queue.put(("done", worker_id))
+
+
+def available_memory():
+    """Bytes of memory available to new processes, or None if unknown.
+
+    Prefers Linux MemAvailable, which counts reclaimable page cache; free
+    physical pages alone badly understate it on a long-running node.
+    """
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024  # Reported in kB
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def max_workers_for_memory():
+    """How many local pipelines fit in currently available memory, or None."""
+    if (available := available_memory()) is None:
+        return None
+    return max(1, available // LOCAL_WORKER_MEMORY)
+
+
+def save_images_sharded(
+    prompts,
+    output_dir: Path,
+    size: str,
+    num_workers: int,
+    threads_per_worker=None,
+    resume=False,
+    upscale=False,
+):
+    """Generate images locally with `num_workers` pinned pipeline processes.
+
+    Returns a throughput summary for the run.
+    """
+    journal = open_journal(output_dir, resume)
+    pending = pending_prompts(prompts, output_dir, journal, resume)
+
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    num_workers = max(1, min(num_workers, len(cores)))
+    if (memory_cap := max_workers_for_memory()) and num_workers > memory_cap:
+        logger.warning(
+            f"[Shard] Only enough memory for {memory_cap} pipelines, "
+            f"using {memory_cap} workers instead of {num_workers}"
+        )
+        num_workers = memory_cap
+    threads = threads_per_worker or max(1, len(cores) // num_workers)
+
+    ctx = mp.get_context("spawn")
+    task_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+    for task in pending:
+        task_queue.put(task)
+    for _ in range(num_workers):
+        task_queue.put(None)
+
+    workers = []
+    for worker_id in range(num_workers):
+        core_set = [
+            cores[(worker_id * threads + i) % len(cores)] for i in range(threads)
+        ]
+        worker = ctx.Process(
+            target=_shard_worker,
+            args=(
+                worker_id,
+                core_set,
+                threads,
+                size,
+                upscale,
+                task_queue,
+                result_queue,
+            ),
+            daemon=True,
+        )
+        worker.start()
+        workers.append(worker)
+    logger.info(
+        f"[Shard] Started {num_workers} workers x {threads} threads "
+        f"for {len(pending)} prompts"
+    )
+
+    busy = [0.0] * num_workers
+    generated = [0] * num_workers
+    start = None  # Set at the first prompt, so pipeline loading is not timed
+    finished = 0
+    while finished < num_workers:
+        try:
+            message = result_queue.get(timeout=5)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                logger.error("[Shard] All workers exited unexpectedly")
+                break
+            continue
+
+        if message[0] == "done":
+            finished += 1
+            continue
+        if message[0] == "start":
+            _, worker_id, idx, prompt = message
+            if start is None:
+                start = time.perf_counter()
+            journal.record(idx, prompt, JobJournal.IN_PROGRESS, worker=worker_id)
+            continue
+        _, worker_id, idx, prompt, img_data, elapsed = message
+        busy[worker_id] += elapsed
+        generated[worker_id] += bool(img_data)
+        write_image(output_dir, idx, prompt, img_data, journal, elapsed)
+    wall = time.perf_counter() - start if start is not None else 0.0
+
+    for worker in workers:
+        worker.join()
+
+    rates = [
+        generated[worker_id] / busy[worker_id] if busy[worker_id] else 0.0
+        for worker_id in range(num_workers)
+    ]
+    for worker_id, rate in enumerate(rates):
+        logger.info(
+            f"[Shard {worker_id}] {generated[worker_id]} images, "
+            f"{rate:.3f} images/s while busy"
+        )
+    # Steady-state rate: what all workers sustain together once loaded
+    summary = {
+        "workers": num_workers,
+        "threads": threads,
+        "images": sum(generated),
+        "seconds": wall,
+        "throughput": sum(rates),
+    }
+    logger.info(
+        f"[Shard] {summary['images']} images in {wall:.1f}s after loading "
+        f"({summary['throughput']:.3f} images/s steady state, "
+        f"{summary['throughput'] / num_workers:.3f} per worker)"
+    )
+    return summary
+
+
+def benchmark_shards(prompts, size: str, worker_counts=None, prompts_per_worker=2):
+    """Measure local throughput for each worker count, splitting cores evenly.
+
+    Without explicit `worker_counts`, powers of two are swept up to the core
+    count and the number of pipelines that fit in available memory. Each point
+    renders `prompts_per_worker` prompts per worker into a scratch directory
+    that is discarded.
+    """
+    if not worker_counts:
+        limit = os.cpu_count() or 1
+        if memory_cap := max_workers_for_memory():
+            limit = min(limit, memory_cap)
+        worker_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= limit]
+
+    curve = []
+    for num_workers in worker_counts:
+        sample = prompts[: num_workers * prompts_per_worker]
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            curve.append(
+                save_images_sharded(sample, Path(scratch_dir), size, num_workers)
+            )
+
+    logger.info("[Benchmark] workers x threads -> steady-state images/s (per worker)")
+    for point in curve:
+        logger.info(
+            f"[Benchmark] {point['workers']:>3} x {point['threads']:<3} -> "
+            f"{point['throughput']:.3f} ({point['throughput'] / point['workers']:.3f})"
+        )
+    return curve
 
 
 @hydra.main(version_base="1.3", config_path=".", config_name="config")
@@ -279,23 +795,52 @@ def main(cfg: DictConfig) -> None:
     output_dir = script_dir / "generated_images"
     prompts = load_prompts(imagegen_file)
 
-    # Choose API
-    if cfg.image_api == "reve":
-        generator = ReveAIGenerator()
-    elif cfg.image_api == "dalle":
-        generator = DalleGenerator()
-    elif cfg.image_api == "huggingface":
-        generator = HuggingFaceGenerator()
-    elif cfg.image_api == "local":
+    local_upscale = cfg.get("local_upscale", False)
+    local_image_size = cfg.get("local_image_size") or cfg.image_size
+
+    if cfg.image_api == "local" and (
+        cfg.get("local_benchmark") or cfg.get("local_workers", 1) > 1
+    ):
         if not HAVE_TORCH:
             logger.error("Local generation requires torch and diffusers")
             return
-        generator = LocalStableDiffusionGenerator()
-    else:
-        logger.error(f"Unsupported image API: {cfg.image_api}")
+        if cfg.get("local_benchmark"):
+            benchmark_shards(
+                prompts,
+                local_image_size,
+                cfg.get("local_benchmark_workers"),
+                cfg.get("local_benchmark_prompts_per_worker", 2),
+            )
+        else:
+            save_images_sharded(
+                prompts,
+                output_dir,
+                local_image_size,
+                cfg.local_workers,
+                cfg.get("local_threads_per_worker"),
+                resume=cfg.get("resume", False),
+                upscale=cfg.get("local_upscale", False),
+            )
+        return
+
+    # Choose API; a list of APIs is tried in order with hedging
+    if OmegaConf.is_list(cfg.image_api):
+        backends = []
+        for name in cfg.image_api:
+            if (
+                backend := create_generator(name, local_upscale, local_image_size)
+            ) is None:
+                return
+            backends.append((name, backend))
+        generator = HedgedGenerator(backends, deadline=cfg.get("hedge_deadline"))
+    elif (
+        generator := create_generator(cfg.image_api, local_upscale, local_image_size)
+    ) is None:
         return
 
-    save_images(generator, prompts, output_dir, cfg.image_size)
+    save_images(
+        generator, prompts, output_dir, cfg.image_size, resume=cfg.get("resume", False)
+    )
 
 
 if __name__ == "__main__":
@@ -2,6 +2,56 @@ import json
 import re
 
 
+def parse_bracketed_element(element_content):
+    """
+    Classifies the content of a bracketed production line, e.g. the
+    "Text on screen: ..." in "[Text on screen: ...]".
+
+    Args:
+        element_content (str): The line with its surrounding brackets removed.
+
+    Returns:
+        dict or None: The script element, or None if the line is not recognised.
+    """
+    if "Title card:" in element_content:
+        return {
+            "type": "graphic",
+            "subtype": "title_card",
+            "content": element_content.replace("Title card:", "").strip().strip('"'),
+        }
+    elif "Visual:" in element_content:
+        return {
+            "type": "shot",
+            "description": element_content.replace("Visual:", "").strip(),
+        }
+    elif "Sound effect:" in element_content:
+        return {
+            "type": "sound",
+            "description": element_content.replace("Sound effect:", "").strip(),
+        }
+    elif "Opening music and animation:" in element_content:
+        return {
+            "type": "music_cue",
+            "description": element_content.replace(
+                "Opening music and animation:", ""
+            ).strip(),
+        }
+    elif "Outro music" in element_content:
+        return {"type": "music_cue", "description": "Outro music"}
+    elif "Text on screen:" in element_content:
+        return {
+            "type": "super",
+            "content": element_content.replace("Text on screen:", "").strip(),
+        }
+    elif "End card" in element_content:
+        return {
+            "type": "graphic",
+            "subtype": "end_card",
+            "description": element_content,
+        }
+    return None
+
+
 def parse_script_into_scenes(script_text):
     """
     Parses a video script into a list of scenes, where each scene is a dictionary
@@ -66,69 +116,8 @@ def parse_script_into_scenes(script_text):
             if line.startswith("[") and "]" in line:
                 element_content = extract_bracketed_content(line)
 
-                if "Title card:" in element_content:
-                    current_scene["elements"].append(
-                        {
-                            "type": "graphic",
-                            "subtype": "title_card",
-                            "content": element_content.replace("Title card:", "")
-                            .strip()
-                            .strip('"'),
-                        }
-                    )
-                elif "Visual:" in element_content:
-                    current_scene["elements"].append(
-                        {
-                            "type": "shot",
-                            "description": element_content.replace(
-                                "Visual:", ""
-                            ).strip(),
-                        }
-                    )
-                elif "Sound effect:" in element_content:
-                    current_scene["elements"].append(
-                        {
-                            "type": "sound",
-                            "description": element_content.replace(
-                                "Sound effect:", ""
-                            ).strip(),
-                        }
-                    )
-                elif "Opening music and animation:" in element_content:
-                    current_scene["elements"].append(
-                        {
-                            "type": "music_cue",
-                            "description": element_content.replace(
-                                "Opening music and animation:", ""
-                            ).strip(),
-                        }
-                    )
-                elif "Outro music" in element_content:
-                    current_scene["elements"].append(
-                        {"type": "music_cue", "description": "Outro music"}
-                    )
-                elif "Text on screen:" in element_content:
-                    current_scene["elements"].append(
-                        {
-                            "type": "super",
-                            "content": element_content.replace(
-                                "Text on screen:", ""
-                            ).strip(),
-                        }
-                    )
-                elif "End card" in element_content:
-                    if current_scene is not None:
-                        current_scene["elements"].append(
-                            {
-                                "type": "graphic",
-                                "subtype": "end_card",
-                                "description": element_content,
-                            }
-                        )
-                    else:
-                        # No current scene is set; choose to either log a warning, create a default scene, or skip
-                        # For now, we'll simply skip appending as there is no valid scene.
-                        pass
+                if element := parse_bracketed_element(element_content):
+                    current_scene["elements"].append(element)
 
             elif line.startswith("Narrator"):
                 tone = "normal"
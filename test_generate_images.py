@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+generate_images = pytest.importorskip("generate_images")
+HedgedGenerator = generate_images.HedgedGenerator
+
+
+class StubGenerator(generate_images.ImageGenerator):
+    def __init__(self, result, delay=0.0, thread_safe=True):
+        self.result = result
+        self.delay = delay
+        self.thread_safe = thread_safe
+        self.calls = 0
+        self.release = threading.Event()
+
+    def generate(self, prompt, size):
+        self.calls += 1
+        if self.delay:
+            self.release.wait(self.delay)
+        return self.result
+
+
+class HungGenerator(generate_images.ImageGenerator):
+    """A backend whose calls never return, like a request without a timeout."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, size):
+        self.calls += 1
+        threading.Event().wait()
+
+
+def test_single_backend_without_deadline():
+    generator = HedgedGenerator([("a", StubGenerator(b"a"))])
+    assert generator.generate("prompt", "64x64") == b"a"
+    assert generator.last_backend == "a"
+
+
+def test_falls_back_when_primary_returns_nothing():
+    generator = HedgedGenerator(
+        [("a", StubGenerator(None)), ("b", StubGenerator(b"b"))]
+    )
+    assert generator.generate("prompt", "64x64") == b"b"
+    assert generator.last_backend == "b"
+
+
+def test_hedges_to_secondary_when_primary_is_slow():
+    slow = StubGenerator(b"a", delay=5.0)
+    generator = HedgedGenerator(
+        [("a", slow), ("b", StubGenerator(b"b"))], initial_hedge_delay=0.05
+    )
+    try:
+        start = time.perf_counter()
+        assert generator.generate("prompt", "64x64") == b"b"
+        assert generator.last_backend == "b"
+        assert time.perf_counter() - start < 2.0
+    finally:
+        slow.release.set()
+
+
+def test_all_backends_failing_returns_none():
+    generator = HedgedGenerator(
+        [("a", StubGenerator(None)), ("b", StubGenerator(None))]
+    )
+    assert generator.generate("prompt", "64x64") is None
+    assert generator.last_backend is None
+
+
+def test_deadline_gives_up():
+    slow = StubGenerator(b"a", delay=5.0)
+    generator = HedgedGenerator([("a", slow)], deadline=0.05)
+    try:
+        assert generator.generate("prompt", "64x64") is None
+    finally:
+        slow.release.set()
+
+
+def test_busy_thread_unsafe_backend_is_skipped():
+    slow = StubGenerator(b"a", delay=5.0, thread_safe=False)
+    generator = HedgedGenerator(
+        [("a", slow), ("b", StubGenerator(b"b"))], initial_hedge_delay=0.05
+    )
+    try:
+        assert generator.generate("first", "64x64") == b"b"
+        # The abandoned call on "a" is still running, so "a" is not reused
+        assert generator.generate("second", "64x64") == b"b"
+        assert slow.calls == 1
+    finally:
+        slow.release.set()
+
+
+def test_hung_backend_does_not_starve_later_frames():
+    hung = HungGenerator()
+    generator = HedgedGenerator(
+        [("hung", hung), ("b", StubGenerator(b"b"))], initial_hedge_delay=0.01
+    )
+    # More frames than any fixed-size pool would have threads for
+    for frame in range(20):
+        assert generator.generate(f"frame {frame}", "64x64") == b"b"
+    assert hung.calls == 20
+    # Abandoned calls must not keep the interpreter alive at exit
+    hung_threads = [
+        thread
+        for thread in threading.enumerate()
+        if thread is not threading.main_thread() and thread.is_alive()
+    ]
+    assert hung_threads and all(thread.daemon for thread in hung_threads)
+
+
+def test_deadline_bounds_http_timeouts():
+    backend = StubGenerator(b"a")
+    backend.timeout = generate_images.HTTP_TIMEOUT
+    HedgedGenerator([("a", backend)], deadline=5)
+    assert backend.timeout == 5